@@ -0,0 +1,299 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+logger = logging.getLogger(__name__)
+
+AIRLINES = ["Delta", "United", "American", "JetBlue", "Air Canada", "Lufthansa", "British Airways", "KLM"]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+  <head><title>{title}</title></head>
+  <body>
+    <div class="skp2" role="progressbar"></div>
+    <div id="results"></div>
+    <script>
+      setTimeout(function () {{
+        document.getElementById("results").innerHTML = {body};
+        document.querySelector("[role=progressbar]").className = "skp2 skp2-hidden skp2-inlined";
+      }}, {progress_ms});
+    </script>
+  </body>
+</html>"""
+
+CARD_TEMPLATE = """<div class="nrc6">
+  <div class="c_cgF c_cgF-mod-variant-default">{airline}</div>
+  <div class="J0g6-operator-text">{airline}</div>
+  <div class="xdW8"><div class="vmXl">{departure}</div><div class="vmXl">{arrival}</div></div>
+  <div class="e2GB-price-text-container"><div class="e2GB-price-text">${price:,}</div></div>
+</div>"""
+
+NO_RESULTS_BODY = '<div class="c8MCw-header-text">No matching results found.</div>'
+BLOCK_PAGE = "<!DOCTYPE html><html><body><div>Please verify you are a human</div></body></html>"
+
+
+class FakeFaresSite:
+    def __init__(self, latency=0.5, jitter=0.2, progress=1.5, no_results_rate=0.1, block_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.progress = progress
+        self.no_results_rate = no_results_rate
+        self.block_rate = block_rate
+        self.seed = seed
+        self.requests = 0
+        self.blocks_served = 0
+        self._visits = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self, host='127.0.0.1', port=0):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, page = site.render(self.path)
+                data = page.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='fake-fares-site', daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/flights"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def render(self, path):
+        # Every page is derived from its URL, so repeated runs see the same fares, gaps and blocks.
+        rng = random.Random(f"{self.seed}:{path}")
+        with self._lock:
+            self.requests += 1
+            visits = self._visits[path] = self._visits.get(path, 0) + 1
+        if not path.startswith('/flights/'):
+            return 404, "<html><body>Not found</body></html>"
+
+        time.sleep(max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        blocked = rng.random() < self.block_rate
+        if blocked and visits == 1:
+            with self._lock:
+                self.blocks_served += 1
+            return 200, BLOCK_PAGE
+
+        if rng.random() < self.no_results_rate:
+            body = NO_RESULTS_BODY
+        else:
+            cards = []
+            for _ in range(rng.randint(3, 12)):
+                departure = rng.randint(0, 23 * 60)
+                arrival = (departure + rng.randint(90, 14 * 60)) % (24 * 60)
+                cards.append(CARD_TEMPLATE.format(
+                    airline=rng.choice(AIRLINES),
+                    departure=f"{departure // 60:02d}:{departure % 60:02d}",
+                    arrival=f"{arrival // 60:02d}:{arrival % 60:02d}",
+                    price=rng.randint(150, 2400)))
+            body = "".join(cards)
+        title = hashlib.sha1(path.encode()).hexdigest()[:8]
+        return 200, PAGE_TEMPLATE.format(title=title, body=json.dumps(body), progress_ms=int(self.progress * 1000))
+
+
+def process_tree_rss(root_pid):
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    parents, rss = {}, {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        parents[int(entry)] = int(fields[1])
+        rss[int(entry)] = int(fields[21]) * page_size
+
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(child for child, parent in parents.items() if parent == pid)
+    return total
+
+
+class RssSampler:
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            self.peak = max(self.peak, process_tree_rss(os.getpid()))
+            if self._stop.wait(self.interval):
+                return
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_benchmark(args):
+    site = FakeFaresSite(args.latency, args.jitter, args.progress, args.no_results_rate, args.block_rate, args.seed)
+    base_url = site.start()
+    workdir = tempfile.mkdtemp(prefix='kfs-bench-')
+
+    os.environ.update({
+        'FLIGHTS_BASE_URL': base_url,
+        'BUSTER_EXTENSION_PATH': '',
+        'CHROME_HEADLESS': '0' if args.headed else '1',
+        'DRIVER_POOL_SIZE': str(args.browsers),
+        'TABS_PER_BROWSER': str(args.tabs_per_browser),
+        'DRIVER_POOL_WARMUP': '0',
+        'RESULT_CACHE_PATH': os.path.join(workdir, 'cache.sqlite3'),
+        'FARE_STORE_PATH': os.path.join(workdir, 'fares.sqlite3'),
+        'LEAN_FETCH': '1' if args.lean else os.environ.get('LEAN_FETCH', '0'),
+        'BLOCK_BACKOFF': os.environ.get('BLOCK_BACKOFF', '2')
+    })
+    from app import create_app
+
+    web = create_app({'UPLOAD_FOLDER': workdir})
+    engine = web.extensions['search_engine']
+    client = web.test_client()
+    start = datetime.strptime(args.date_from, '%Y-%m-%d').date()
+    form = {
+        'departure_airport': args.departure,
+        'arrival_airport': args.arrival,
+        'date_from': start.strftime('%Y-%m-%d'),
+        'date_to': (start + timedelta(days=args.dates - 1)).strftime('%Y-%m-%d'),
+        'nights': str(args.nights),
+        'stops': '0',
+        'flight_hours': '20',
+        'country': 'USA',
+        'num_tabs': str(args.num_tabs or engine.driver_pool.size)
+    }
+
+    reports = []
+    try:
+        for run in range(1, args.runs + 1):
+            engine.result_cache.clear()
+            pool_before = engine.driver_pool.stats()
+            requests_before = site.requests
+            with RssSampler() as sampler:
+                started = time.monotonic()
+                response = client.post('/', data=form)
+                job = engine.job_manager.get(response.headers['Location'].rsplit('/', 1)[1])
+                while not job.done:
+                    time.sleep(0.2)
+                elapsed = time.monotonic() - started
+            pool_after = engine.driver_pool.stats()
+            summary = job.context.summary() if job.context is not None else {}
+            latencies = [seconds for attempts in job.context.timings.values() for seconds in attempts] if job.context is not None else []
+            reports.append({
+                'run': run,
+                'status': job.status,
+                'dates': args.dates,
+                'found': summary.get('found', 0),
+                'no_results': summary.get('no_results', 0),
+                'failed': summary.get('failed', 0),
+                'seconds': round(elapsed, 2),
+                'pages_per_min': round(args.dates / elapsed * 60, 1) if elapsed else 0,
+                'requests': site.requests - requests_before,
+                'p50_seconds': round(percentile(latencies, 0.5), 2),
+                'p95_seconds': round(percentile(latencies, 0.95), 2),
+                'mean_seconds': round(statistics.mean(latencies), 2) if latencies else 0,
+                'peak_rss_mb': round(sampler.peak / 2 ** 20, 1),
+                'driver_starts': pool_after['created'] - pool_before['created'],
+                'driver_renewals': pool_after['renewed'] - pool_before['renewed'],
+                'phases': summary.get('phases', {})
+            })
+    finally:
+        engine.driver_pool.shutdown()
+        site.stop()
+    return reports
+
+
+def print_report(reports):
+    columns = ['run', 'status', 'dates', 'found', 'no_results', 'failed', 'seconds', 'pages_per_min',
+               'p50_seconds', 'p95_seconds', 'peak_rss_mb', 'driver_starts', 'driver_renewals']
+    widths = [max(len(column), *(len(str(report[column])) for report in reports)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for report in reports:
+        print("  ".join(str(report[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the search pipeline against a local fake fares site and report throughput.")
+    parser.add_argument('--dates', type=int, default=20, help="dates per search")
+    parser.add_argument('--date-from', default='2030-01-07', help="first date; fixed so every run hits the same fake pages")
+    parser.add_argument('--runs', type=int, default=1, help="searches to run back to back")
+    parser.add_argument('--nights', type=int, default=7)
+    parser.add_argument('--departure', default='JFK')
+    parser.add_argument('--arrival', default='LHR')
+    parser.add_argument('--browsers', type=int, default=4, help="Chrome processes in the pool")
+    parser.add_argument('--tabs-per-browser', type=int, default=1)
+    parser.add_argument('--num-tabs', type=int, default=0, help="concurrent dates per search (default: pool size)")
+    parser.add_argument('--lean', action='store_true')
+    parser.add_argument('--headed', action='store_true', help="show the browser windows")
+    parser.add_argument('--latency', type=float, default=0.5, help="server response delay in seconds")
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--progress', type=float, default=1.5, help="seconds until the progress bar hides")
+    parser.add_argument('--no-results-rate', type=float, default=0.1)
+    parser.add_argument('--block-rate', type=float, default=0.0, help="share of URLs that get a block page on first visit")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--serve', action='store_true', help="only run the fake site until interrupted")
+    parser.add_argument('--json', help="also write the reports to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+
+    if args.serve:
+        site = FakeFaresSite(args.latency, args.jitter, args.progress, args.no_results_rate, args.block_rate, args.seed)
+        logger.warning(f"🛰️ Fake fares site at {site.start(port=8765)}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            site.stop()
+        return
+
+    reports = run_benchmark(args)
+    print_report(reports)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,468 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPool:
+    def __init__(self, factory, size=10, max_uses=50, max_age=1800):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self._idle = deque()
+        self._leased = set()
+        self._meta = {}
+        self._slots = 0
+        self._closed = False
+        self._counts = {'created': 0, 'recycled': 0, 'renewed': 0, 'discarded': 0}
+        self._cond = threading.Condition()
+
+    def lease(self, timeout=None):
+        driver = self._acquire_slot(timeout)
+        try:
+            if driver is not None and not self._is_reusable(driver):
+                self._quit(driver)
+                self._count('recycled')
+                driver = None
+            if driver is None:
+                driver = self._create()
+        except Exception:
+            self._free_slot()
+            raise
+        with self._cond:
+            self._leased.add(id(driver))
+            self._meta[id(driver)]['uses'] += 1
+        return driver
+
+    def release(self, driver):
+        with self._cond:
+            if id(driver) not in self._leased:
+                logger.warning("⚠️ Ignoring release of a driver that is not leased from the pool")
+                return
+            self._leased.discard(id(driver))
+            if not self._closed:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+        self._quit(driver)
+        self._free_slot()
+
+    def discard(self, driver):
+        with self._cond:
+            was_leased = id(driver) in self._leased
+            self._leased.discard(id(driver))
+        self._quit(driver)
+        self._count('discarded')
+        if was_leased:
+            self._free_slot()
+
+    def renew(self, driver):
+        with self._cond:
+            self._leased.discard(id(driver))
+        self._quit(driver)
+        self._count('renewed')
+        try:
+            new_driver = self._create()
+        except Exception:
+            self._free_slot()
+            raise
+        with self._cond:
+            self._leased.add(id(new_driver))
+            self._meta[id(new_driver)]['uses'] += 1
+        return new_driver
+
+    def warm_up(self, count):
+        count = min(count, self.size)
+        drivers = []
+        for _ in range(count):
+            try:
+                drivers.append(self.lease())
+            except Exception as e:
+                logger.warning(f"❌ Driver warm-up failed: {str(e).splitlines()[0]}")
+                break
+        for driver in drivers:
+            self.release(driver)
+        logger.info(f"🔥 Driver pool warmed up with {len(drivers)} browser(s)")
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': self._slots,
+                'idle': len(self._idle),
+                'leased': len(self._leased),
+                **self._counts
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
+            self._free_slot()
+
+    def _acquire_slot(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is shut down")
+                if self._idle:
+                    return self._idle.popleft()
+                if self._slots < self.size:
+                    self._slots += 1
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free driver")
+                self._cond.wait(remaining)
+
+    def _free_slot(self):
+        with self._cond:
+            self._slots -= 1
+            self._cond.notify()
+
+    def _create(self):
+        driver = self.factory()
+        with self._cond:
+            self._meta[id(driver)] = {'created': time.monotonic(), 'uses': 0}
+            self._counts['created'] += 1
+        return driver
+
+    def _count(self, name):
+        with self._cond:
+            self._counts[name] += 1
+
+    def _quit(self, driver):
+        with self._cond:
+            self._meta.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"⚠️ Error quitting driver: {str(e).splitlines()[0]}")
+
+    def _is_reusable(self, driver):
+        with self._cond:
+            meta = self._meta.get(id(driver))
+        if meta is None:
+            return False
+        if meta['uses'] >= self.max_uses:
+            logger.info("♻️ Recycling driver after reaching max uses")
+            return False
+        if time.monotonic() - meta['created'] > self.max_age:
+            logger.info("♻️ Recycling driver after reaching max age")
+            return False
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Driver failed health check: {str(e).splitlines()[0]}")
+            return False
+
+
+class TabbedBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.lock = threading.RLock()
+        self.current = driver.current_window_handle
+        self.created = time.monotonic()
+        self.leased = 0
+        self.dead = False
+
+    @contextmanager
+    def focus(self, handle):
+        with self.lock:
+            if self.current != handle:
+                self.driver.switch_to.window(handle)
+                self.current = handle
+            yield self.driver
+
+    def open_tab(self):
+        with self.lock:
+            self.driver.switch_to.new_window('tab')
+            self.current = self.driver.current_window_handle
+            prepare_tab = getattr(self.driver, 'prepare_tab', None)
+            if prepare_tab:
+                prepare_tab(self.driver)
+            return self.current
+
+    def close_tab(self, handle):
+        from selenium.common.exceptions import WebDriverException
+
+        # Closed through the browser target so a hung renderer cannot block the switch into it.
+        with self.lock:
+            try:
+                self.driver.execute_cdp_cmd('Target.closeTarget', {'targetId': handle})
+            except WebDriverException:
+                with self.focus(handle):
+                    self.driver.close()
+            if self.current == handle:
+                self.current = None
+
+
+class BrowserTab:
+    results_payload_pattern = None
+
+    def __init__(self, browser, handle):
+        self.browser = browser
+        self.handle = handle
+        self.uses = 0
+
+    def get(self, url, timeout=30, poll_frequency=0.25):
+        # Navigate without holding the browser for the whole page load so sibling tabs keep loading.
+        with self.browser.focus(self.handle) as driver:
+            driver.execute_script("window.__kfsNavigating = true; window.location.href = arguments[0];", url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(poll_frequency)
+            with self.browser.focus(self.handle) as driver:
+                if driver.execute_script("return window.__kfsNavigating === undefined && document.readyState !== 'loading';"):
+                    return
+        from selenium.common.exceptions import TimeoutException
+        raise TimeoutException(f"Tab did not navigate to {url} within {timeout}s")
+
+    @property
+    def page_source(self):
+        with self.browser.focus(self.handle) as driver:
+            return driver.page_source
+
+    @property
+    def current_url(self):
+        with self.browser.focus(self.handle) as driver:
+            return driver.current_url
+
+    def __getattr__(self, name):
+        attr = getattr(self.browser.driver, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self.browser.focus(self.handle):
+                return attr(*args, **kwargs)
+        return call
+
+
+class TabPool:
+    def __init__(self, factory, browsers=2, tabs_per_browser=4, max_uses=50, max_age=1800, command_timeout=20):
+        self.factory = factory
+        self.browsers = browsers
+        self.tabs_per_browser = tabs_per_browser
+        self.size = browsers * tabs_per_browser
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.command_timeout = command_timeout
+        self._browsers = []
+        self._idle = deque()
+        self._leased = set()
+        self._launching = 0
+        self._closed = False
+        self._counts = {'created': 0, 'recycled': 0, 'renewed': 0, 'discarded': 0, 'tabs_opened': 0}
+        self._cond = threading.Condition()
+
+    def lease(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            tab = self._acquire(deadline)
+            if tab is None:
+                try:
+                    self._launch()
+                finally:
+                    with self._cond:
+                        self._launching -= 1
+                        self._cond.notify_all()
+                continue
+            if self._is_reusable(tab):
+                return tab
+            self._count('recycled')
+            self._retire_tab(tab)
+
+    def release(self, tab):
+        with self._cond:
+            if id(tab) not in self._leased:
+                logger.warning("⚠️ Ignoring release of a tab that is not leased from the pool")
+                return
+            self._leased.discard(id(tab))
+            tab.browser.leased -= 1
+            if not self._closed and not tab.browser.dead and not self._expired(tab.browser):
+                self._idle.append(tab)
+                self._cond.notify()
+                return
+        self._drop_if_drained(tab.browser)
+
+    def discard(self, tab):
+        self._count('discarded')
+        self._retire_tab(tab)
+
+    def renew(self, tab):
+        self._count('renewed')
+        new_tab = self._retire_tab(tab, keep_leased=True)
+        return new_tab if new_tab is not None else self.lease()
+
+    def warm_up(self, count):
+        count = min(count, self.size)
+        tabs = []
+        for _ in range(count):
+            try:
+                tabs.append(self.lease())
+            except Exception as e:
+                logger.warning(f"❌ Tab pool warm-up failed: {str(e).splitlines()[0]}")
+                break
+        for tab in tabs:
+            self.release(tab)
+        logger.info(f"🔥 Tab pool warmed up with {len(tabs)} tab(s) across {len(self._browsers)} browser(s)")
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'open': len(self._idle) + len(self._leased),
+                'idle': len(self._idle),
+                'leased': len(self._leased),
+                'browsers': len(self._browsers),
+                **self._counts
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            browsers = list(self._browsers)
+            self._browsers.clear()
+            self._idle.clear()
+            self._cond.notify_all()
+        for browser in browsers:
+            self._quit(browser)
+
+    def _acquire(self, deadline):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Tab pool is shut down")
+                if self._idle:
+                    tab = self._idle.popleft()
+                    self._leased.add(id(tab))
+                    tab.browser.leased += 1
+                    tab.uses += 1
+                    return tab
+                if len(self._browsers) + self._launching < self.browsers:
+                    self._launching += 1
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free tab")
+                self._cond.wait(remaining)
+
+    def _launch(self):
+        driver = self.factory()
+        browser = TabbedBrowser(driver)
+        tabs = [BrowserTab(browser, browser.current)]
+        try:
+            driver.set_script_timeout(self.command_timeout)
+            driver.set_page_load_timeout(self.command_timeout)
+            for _ in range(self.tabs_per_browser - 1):
+                tabs.append(BrowserTab(browser, browser.open_tab()))
+        except Exception:
+            self._quit(browser)
+            raise
+        with self._cond:
+            self._counts['created'] += 1
+            self._counts['tabs_opened'] += len(tabs)
+            if self._closed:
+                tabs = []
+            else:
+                self._browsers.append(browser)
+                self._idle.extend(tabs)
+                self._cond.notify_all()
+        if not tabs:
+            self._quit(browser)
+        else:
+            logger.info(f"🗂️ Started a browser with {len(tabs)} tab(s)")
+
+    def _retire_tab(self, tab, keep_leased=False):
+        # Swap the tab for a fresh one in the same browser; give the whole browser up if that fails.
+        browser = tab.browser
+        with self._cond:
+            was_leased = id(tab) in self._leased
+            self._leased.discard(id(tab))
+            if was_leased:
+                browser.leased -= 1
+            replace = not self._closed and not browser.dead and not self._expired(browser)
+        if not replace:
+            self._drop_if_drained(browser)
+            return None
+        try:
+            handle = browser.open_tab()
+            browser.close_tab(tab.handle)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not replace a tab, restarting its browser: {str(e).splitlines()[0]}")
+            self._kill(browser)
+            return None
+        new_tab = BrowserTab(browser, handle)
+        with self._cond:
+            self._counts['tabs_opened'] += 1
+            if keep_leased:
+                self._leased.add(id(new_tab))
+                browser.leased += 1
+                new_tab.uses += 1
+            else:
+                self._idle.append(new_tab)
+                self._cond.notify()
+        return new_tab
+
+    def _drop_if_drained(self, browser):
+        with self._cond:
+            if browser.leased > 0 or browser not in self._browsers:
+                return
+            self._browsers.remove(browser)
+            self._idle = deque(tab for tab in self._idle if tab.browser is not browser)
+            self._cond.notify_all()
+        self._quit(browser)
+
+    def _kill(self, browser):
+        with self._cond:
+            browser.dead = True
+            if browser in self._browsers:
+                self._browsers.remove(browser)
+            self._idle = deque(tab for tab in self._idle if tab.browser is not browser)
+            self._cond.notify_all()
+        self._quit(browser)
+
+    def _expired(self, browser):
+        return time.monotonic() - browser.created > self.max_age
+
+    def _count(self, name):
+        with self._cond:
+            self._counts[name] += 1
+
+    def _quit(self, browser):
+        browser.dead = True
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning(f"⚠️ Error quitting driver: {str(e).splitlines()[0]}")
+
+    def _is_reusable(self, tab):
+        if tab.uses > self.max_uses:
+            logger.info("♻️ Recycling tab after reaching max uses")
+            return False
+        if self._expired(tab.browser):
+            logger.info("♻️ Recycling browser after reaching max age")
+            return False
+        try:
+            tab.execute_script("return 1")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Tab failed health check: {str(e).splitlines()[0]}")
+            return False
+
+
+def open_pool(factory, size=10, tabs_per_browser=1, max_uses=50, max_age=1800):
+    if tabs_per_browser > 1:
+        return TabPool(factory, browsers=size, tabs_per_browser=tabs_per_browser, max_uses=max_uses, max_age=max_age)
+    return DriverPool(factory, size=size, max_uses=max_uses, max_age=max_age)
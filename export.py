@@ -0,0 +1,146 @@
+import logging
+import re
+from datetime import datetime
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, Border, Side
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['Date', 'Departure Airport', 'Arrival Airport', 'Nights', 'Airline', 'Price', 'Departure Time', 'Arrival Time']
+COLUMN_NUMBER_FORMATS = {'Date': 'DD-MMM-YY'}
+MAX_SHEET_NAME = 31
+INVALID_SHEET_CHARS = re.compile(r'[\\/*?:\[\]]')
+
+CENTER = Alignment(horizontal='center')
+BOLD = Font(bold=True)
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+
+class ExcelExporter:
+    def __init__(self, output_file, columns=COLUMNS):
+        self.output_file = output_file
+        self.columns = columns
+        self.dates = set()
+        self.rows = 0
+        self._workbook = None
+        self._sheets = {}
+
+    def append(self, flight_data, sheet_title=None):
+        flight_date = datetime.strptime(flight_data['Date'], '%d-%b-%y')
+        key = (sheet_title, flight_date.date(), flight_data.get('Nights'))
+        if key in self.dates:
+            return False
+        self.dates.add(key)
+
+        ws = self._sheet(sheet_title)
+        row = []
+        for column in self.columns:
+            value = flight_date if column == 'Date' else flight_data.get(column)
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = CENTER
+            cell.border = THIN_BORDER
+            if column in COLUMN_NUMBER_FORMATS:
+                cell.number_format = COLUMN_NUMBER_FORMATS[column]
+            row.append(cell)
+        ws.append(row)
+        self.rows += 1
+        return True
+
+    def save(self):
+        if not self.rows:
+            logger.info("📭 Nothing to export")
+            return None
+        self._workbook.save(self.output_file)
+        logger.info(f"💾 Exported {self.rows} row(s) to {self.output_file}")
+        return self.output_file
+
+    def _sheet(self, title):
+        if self._workbook is None:
+            self._workbook = Workbook(write_only=True)
+        ws = self._sheets.get(title)
+        if ws is None:
+            ws = self._workbook.create_sheet(title=self._sheet_name(title) if title else None)
+            if title:
+                # Sheet names are capped at 31 characters, so the full route label heads the sheet.
+                label = WriteOnlyCell(ws, value=title)
+                label.font = BOLD
+                ws.append([label])
+            header = []
+            for column in self.columns:
+                cell = WriteOnlyCell(ws, value=column)
+                cell.alignment = CENTER
+                cell.border = THIN_BORDER
+                cell.font = BOLD
+                header.append(cell)
+            ws.append(header)
+            self._sheets[title] = ws
+        return ws
+
+    def _sheet_name(self, title):
+        name = INVALID_SHEET_CHARS.sub('-', title)
+        if len(name) > MAX_SHEET_NAME and name.endswith(')') and ' (' in name:
+            # Keep the filters that tell same-airport routes apart and shorten the route instead.
+            route, filters = name[:-1].rsplit(' (', 1)
+            filters = filters.replace(' stops', 's').replace(', ', ' ')
+            name = f"{route[:max(0, MAX_SHEET_NAME - len(filters) - 1)]} {filters}"
+        name = name[:MAX_SHEET_NAME]
+        taken = {ws.title.lower() for ws in self._sheets.values()}
+        unique, n = name, 2
+        while unique.lower() in taken:
+            suffix = f" ~{n}"
+            unique = name[:MAX_SHEET_NAME - len(suffix)] + suffix
+            n += 1
+        return unique
+
+
+class ParquetExporter:
+    def __init__(self, output_file, columns=COLUMNS):
+        self.output_file = output_file
+        self.columns = columns
+        self.dates = set()
+        self.rows = 0
+        self._routes = {}
+
+    def append(self, flight_data, sheet_title=None):
+        flight_date = datetime.strptime(flight_data['Date'], '%d-%b-%y').date()
+        key = (sheet_title, flight_date, flight_data.get('Nights'))
+        if key in self.dates:
+            return False
+        self.dates.add(key)
+
+        row = {column: flight_data.get(column) for column in self.columns}
+        row['Date'] = flight_date
+        row['Route'] = sheet_title or ''
+        self._routes.setdefault(sheet_title or '', []).append(row)
+        self.rows += 1
+        return True
+
+    def save(self):
+        if not self.rows:
+            logger.info("📭 Nothing to export")
+            return None
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+        fields = [pa.field('Route', pa.string())]
+        for column in self.columns:
+            if column == 'Date':
+                fields.append(pa.field(column, pa.date32()))
+            elif column == 'Nights':
+                fields.append(pa.field(column, pa.int64()))
+            elif column == 'Price':
+                fields.append(pa.field(column, pa.float64()))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        schema = pa.schema(fields)
+
+        with pq.ParquetWriter(self.output_file, schema) as writer:
+            for route in sorted(self._routes):
+                writer.write_table(pa.Table.from_pylist(self._routes[route], schema=schema))
+        logger.info(f"💾 Exported {self.rows} row(s) across {len(self._routes)} route(s) to {self.output_file}")
+        return self.output_file
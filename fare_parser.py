@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+
+from lxml import html as lxml_html
+
+FLIGHT_CARD_XPATH = "//div[contains(@class, 'nrc6') and not(ancestor::div[contains(@class, 'nrc6')])]"
+PRICE_XPATH = ".//div[contains(@class, 'e2GB-price-text-container')]/div[contains(@class, 'e2GB-price-text')]"
+AIRLINE_XPATH = ".//div[contains(@class, 'J0g6-operator-text')]"
+USA_AIRLINE_XPATH = ".//div[contains(@class, 'c_cgF c_cgF-mod-variant-default')]"
+TIMES_XPATH = ".//div[contains(@class, 'xdW8')]/div[contains(@class, 'vmXl')]"
+
+
+@dataclass
+class FlightCard:
+    airline: str
+    price_text: str
+    departure_time: str
+    arrival_time: str
+
+    @property
+    def price(self):
+        if not self.price_text or not self.price_text.replace('.', '').isdigit():
+            raise ValueError(f"Invalid or missing price: '{self.price_text}'")
+        return float(self.price_text)
+
+
+def _text(element):
+    return " ".join(element.text_content().split())
+
+
+def _first_text(card, xpath, default="-"):
+    elements = card.xpath(xpath)
+    if not elements:
+        return default
+    return _text(elements[0])
+
+
+def parse_flight_card(card, country='USA'):
+    price_text = _first_text(card, PRICE_XPATH).replace('$', '').replace(',', '').strip()
+    if country == 'Canada':
+        price_text = price_text.replace('C ', '')
+
+    airline_xpath = USA_AIRLINE_XPATH if country == 'USA' else AIRLINE_XPATH
+    times = [_text(element) for element in card.xpath(TIMES_XPATH)]
+
+    return FlightCard(
+        airline=_first_text(card, airline_xpath),
+        price_text=price_text,
+        departure_time=times[0] if len(times) > 0 else "-",
+        arrival_time=times[1] if len(times) > 1 else "-"
+    )
+
+
+def parse_results_page(page_source, country='USA'):
+    if not page_source:
+        return []
+    tree = lxml_html.fromstring(page_source)
+    return [parse_flight_card(card, country) for card in tree.xpath(FLIGHT_CARD_XPATH)]
+
+
+PAYLOAD_PRICE_KEYS = ('price', 'totalPrice', 'displayPrice')
+PAYLOAD_AIRLINE_KEYS = ('airline', 'airlines', 'airlineName', 'carrier', 'operator')
+PAYLOAD_DEPARTURE_KEYS = ('departureTime', 'departure')
+PAYLOAD_ARRIVAL_KEYS = ('arrivalTime', 'arrival')
+
+
+def _payload_value(node, keys):
+    for key in keys:
+        value = node.get(key)
+        if isinstance(value, dict):
+            value = value.get('price', value.get('amount', value.get('name', value.get('displayName'))))
+        if isinstance(value, list) and value and isinstance(value[0], (str, dict)):
+            value = value[0].get('name') if isinstance(value[0], dict) else value[0]
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _payload_price_text(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{value:.2f}".rstrip('0').rstrip('.')
+    if isinstance(value, str):
+        return value.replace('C$', '').replace('$', '').replace(',', '').strip()
+    return None
+
+
+def parse_results_payload(payload):
+    cards = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            price_text = _payload_price_text(_payload_value(node, PAYLOAD_PRICE_KEYS))
+            airline = _payload_value(node, PAYLOAD_AIRLINE_KEYS)
+            if price_text and price_text.replace('.', '').isdigit() and isinstance(airline, str):
+                departure = _payload_value(node, PAYLOAD_DEPARTURE_KEYS)
+                arrival = _payload_value(node, PAYLOAD_ARRIVAL_KEYS)
+                cards.append(FlightCard(
+                    airline=airline,
+                    price_text=price_text,
+                    departure_time=departure if isinstance(departure, str) else "-",
+                    arrival_time=arrival if isinstance(arrival, str) else "-"
+                ))
+                return
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(payload)
+    return cards
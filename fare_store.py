@@ -0,0 +1,111 @@
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def stops_key(stops):
+    if isinstance(stops, str):
+        stops = stops.split(',')
+    return ",".join(sorted({str(stop).strip() for stop in stops or [] if str(stop).strip()}))
+
+
+class FareStore:
+    def __init__(self, path='fare_history.sqlite3'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fares (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scraped_at REAL NOT NULL,
+                route TEXT NOT NULL,
+                travel_date TEXT NOT NULL,
+                nights INTEGER NOT NULL,
+                country TEXT,
+                airline TEXT,
+                price REAL NOT NULL,
+                departure_time TEXT,
+                arrival_time TEXT,
+                stops TEXT,
+                flight_hours INTEGER
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fares_route_date ON fares (route, travel_date, nights)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS fares_route_scraped_at ON fares (route, scraped_at)")
+        self._conn.commit()
+
+    def append(self, route, travel_date, search_params, flight_data, scraped_at=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO fares (scraped_at, route, travel_date, nights, country, airline, price, departure_time, arrival_time, stops, flight_hours) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (scraped_at or time.time(), route, travel_date.strftime('%Y-%m-%d'), int(search_params['nights']),
+                 search_params.get('country', 'USA'), flight_data['Airline'], float(flight_data['Price']),
+                 flight_data['Departure Time'], flight_data['Arrival Time'],
+                 stops_key(search_params.get('stops')), int(search_params['flight_hours'])))
+            self._conn.commit()
+
+    def trend(self, route, nights=None, date_from=None, date_to=None, since=None, country=None, stops=None, flight_hours=None):
+        where, args = self._filters(route, nights, date_from, date_to, since, country, stops, flight_hours)
+        # Prices are in the country's currency, so each country gets its own series.
+        rows = self._query(f"""
+            SELECT date(scraped_at, 'unixepoch', 'localtime') AS scraped_on, country,
+                   MIN(price) AS min_price, ROUND(AVG(price), 2) AS avg_price, MAX(price) AS max_price,
+                   COUNT(*) AS observations
+            FROM fares WHERE {where}
+            GROUP BY scraped_on, country ORDER BY scraped_on, country
+        """, args)
+        return [dict(row) for row in rows]
+
+    def cheapest_by_date(self, route, nights=None, date_from=None, date_to=None, since=None, country=None, stops=None, flight_hours=None):
+        where, args = self._filters(route, nights, date_from, date_to, since, country, stops, flight_hours)
+        # SQLite returns the other bare columns from the row holding MIN(price).
+        rows = self._query(f"""
+            SELECT travel_date, nights, country, MIN(price) AS price, airline, departure_time, arrival_time,
+                   scraped_at, COUNT(*) AS observations
+            FROM fares WHERE {where}
+            GROUP BY travel_date, nights, country ORDER BY travel_date, nights, country
+        """, args)
+        return [dict(row, scraped_at=datetime.fromtimestamp(row['scraped_at']).isoformat(timespec='seconds')) for row in rows]
+
+    def routes(self):
+        rows = self._query("SELECT route, COUNT(*) AS observations, MAX(scraped_at) AS last_scraped_at FROM fares GROUP BY route ORDER BY route", ())
+        return [dict(row, last_scraped_at=datetime.fromtimestamp(row['last_scraped_at']).isoformat(timespec='seconds')) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _filters(self, route, nights, date_from, date_to, since, country=None, stops=None, flight_hours=None):
+        clauses, args = ["route = ?"], [route]
+        if nights is not None:
+            clauses.append("nights = ?")
+            args.append(int(nights))
+        if date_from:
+            clauses.append("travel_date >= ?")
+            args.append(datetime.strptime(date_from, '%Y-%m-%d').strftime('%Y-%m-%d'))
+        if date_to:
+            clauses.append("travel_date <= ?")
+            args.append(datetime.strptime(date_to, '%Y-%m-%d').strftime('%Y-%m-%d'))
+        if since:
+            clauses.append("scraped_at >= ?")
+            args.append(datetime.strptime(since, '%Y-%m-%d').timestamp())
+        if country:
+            clauses.append("country = ? COLLATE NOCASE")
+            args.append(country)
+        if stops is not None:
+            clauses.append("stops = ?")
+            args.append(stops_key(stops))
+        if flight_hours is not None:
+            clauses.append("flight_hours = ?")
+            args.append(int(flight_hours))
+        return " AND ".join(clauses), args
+
+    def _query(self, sql, args):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
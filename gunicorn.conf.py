@@ -0,0 +1,15 @@
+import os
+
+# Search jobs, their progress events and the Chrome pool live in the app process's memory, so a
+# second worker process would not see jobs started by the first. Run one worker and scale with threads;
+# the threads also keep /jobs/<id>/events streams from tying up the whole worker.
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+
+def on_starting(server):
+    if server.cfg.workers > 1:
+        raise RuntimeError(f"Search jobs are kept in process memory; run a single worker (got {server.cfg.workers}) and raise GUNICORN_THREADS instead")
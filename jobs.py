@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    def __init__(self, search_params):
+        self.id = uuid.uuid4().hex
+        self.search_params = search_params
+        self.status = 'queued'
+        self.phase = 'queued'
+        self.total = 0
+        self.completed = 0
+        self.output_file = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.context = None
+        self.events = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def set_phase(self, phase, total=None):
+        with self._lock:
+            self.phase = phase
+            if total is not None:
+                self.total = total
+                self.completed = 0
+            data = {'phase': phase, 'total': self.total, 'completed': self.completed}
+        self.publish('phase', data)
+
+    def publish(self, event, data):
+        with self._changed:
+            self.events.append({'id': len(self.events) + 1, 'event': event, 'data': data})
+            self._changed.notify_all()
+
+    def events_after(self, last_id, timeout=None):
+        with self._changed:
+            if len(self.events) <= last_id and not self.done:
+                self._changed.wait(timeout)
+            return self.events[last_id:]
+
+    def advance(self, step=1):
+        with self._lock:
+            self.completed = min(self.completed + step, self.total)
+
+    def cancel(self):
+        if not self.done:
+            logger.info(f"🛑 Cancelling search job {self.id}")
+            self.cancel_event.set()
+
+    @property
+    def done(self):
+        return self.status in ('finished', 'failed', 'cancelled')
+
+    def to_dict(self):
+        summary = self.context.summary() if self.context is not None else {}
+        with self._lock:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'phase': self.phase,
+                'total': self.total,
+                'completed': self.completed,
+                'output_file': self.output_file,
+                'error': self.error,
+                'summary': summary,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobManager:
+    def __init__(self, max_concurrent_jobs=2, max_finished_jobs=200):
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs, thread_name_prefix='search-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, search_params, runner):
+        job = Job(search_params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+        logger.info(f"📥 Queued search job {job.id}")
+        self._executor.submit(self._run, job, runner)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_count(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == 'running')
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, runner):
+        if job.cancel_event.is_set():
+            job.status = 'cancelled'
+            job.phase = 'cancelled'
+            job.finished_at = time.time()
+            job.publish('done', {'status': job.status, 'output_file': None, 'error': None})
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        logger.info(f"🚀 Starting search job {job.id}")
+        try:
+            job.output_file = runner(job.search_params, job)
+            job.status = 'cancelled' if job.cancel_event.is_set() else 'finished'
+            job.phase = job.status
+            logger.info(f"🏁 Search job {job.id} {job.status}")
+        except Exception as e:
+            job.error = str(e).splitlines()[0] if str(e) else e.__class__.__name__
+            job.status = 'failed'
+            job.phase = 'failed'
+            logger.exception(f"❌ Search job {job.id} failed")
+        finally:
+            job.finished_at = time.time()
+            job.publish('done', {'status': job.status, 'output_file': job.output_file, 'error': job.error})
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,94 @@
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 120, 300)
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def incr(self, name, step=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + step
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, name, callback=None, **labels):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.observe(name, elapsed, **labels)
+            if callback is not None:
+                callback(elapsed)
+
+    def render(self, collectors=()):
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            header(name, 'histogram')
+            for bound, count in zip(self.buckets, histogram['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+        for collector in collectors:
+            for name, kind, value, labels in collector():
+                header(name, kind)
+                lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
+metrics.describe('scrape_phase_seconds', 'Time spent in each phase of a per-date scrape.')
+metrics.describe('scrape_outcomes_total', 'Per-date scrape outcomes.')
+metrics.describe('scrape_block_events_total', 'Block pages detected while scraping.')
+metrics.describe('scrape_retries_total', 'Per-date tasks requeued after a failure or timeout.')
+metrics.describe('scrape_task_timeouts_total', 'Per-date tasks abandoned by the scheduler after exceeding the task timeout.')
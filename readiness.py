@@ -0,0 +1,73 @@
+import logging
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+RESULTS = 'results'
+NO_RESULTS = 'no_results'
+BLOCKED = 'blocked'
+TIMEOUT = 'timeout'
+PAYLOAD = 'payload'
+
+BLOCKING_INDICATORS = [
+    "//div[contains(text(), 'Access Denied')]",
+    "//div[contains(text(), 'Checking your browser')]",
+    "//div[contains(text(), 'Please verify you are a human')]",
+    "//iframe[contains(@title, 'recaptcha')]",
+    "//div[contains(@class, 'cf-challenge')]"
+]
+NO_RESULTS_XPATH = "//div[@class='c8MCw-header-text' and contains(text(), 'No matching results found.')]"
+PROGRESS_BAR_HIDDEN_XPATH = "//div[@class='skp2 skp2-hidden skp2-inlined' and @role='progressbar']"
+FLIGHT_CARD_XPATH = "//div[contains(@class, 'nrc6')]"
+
+PAGE_STATE_SCRIPT = """
+const [blockingIndicators, noResultsXpath, progressHiddenXpath, flightCardXpath] = arguments;
+const exists = (xpath) => document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue !== null;
+if (blockingIndicators.some(exists)) {
+    return 'blocked';
+}
+if (exists(noResultsXpath)) {
+    return 'no_results';
+}
+if (exists(progressHiddenXpath)) {
+    return exists(flightCardXpath) ? 'results' : 'loaded';
+}
+return null;
+"""
+
+
+def probe_page_state(driver):
+    try:
+        return driver.execute_script(PAGE_STATE_SCRIPT, BLOCKING_INDICATORS, NO_RESULTS_XPATH, PROGRESS_BAR_HIDDEN_XPATH, FLIGHT_CARD_XPATH)
+    except WebDriverException:
+        return None
+
+
+def wait_for_page_state(driver, timeout=48, settle_timeout=8, poll_frequency=0.25, payload_ready=None):
+    started = time.monotonic()
+    loaded_at = []
+
+    def resolved(d):
+        if payload_ready is not None and payload_ready(d):
+            return PAYLOAD
+        state = probe_page_state(d)
+        if state in (RESULTS, NO_RESULTS, BLOCKED):
+            return state
+        if state == 'loaded':
+            if not loaded_at:
+                loaded_at.append(time.monotonic())
+            elif time.monotonic() - loaded_at[0] >= settle_timeout:
+                return RESULTS
+        return False
+
+    try:
+        state = WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(resolved)
+    except TimeoutException:
+        state = RESULTS if loaded_at else TIMEOUT
+    logger.info(f"🚦 Page state '{state}' after {time.monotonic() - started:.1f}s")
+    return state
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from queue import Queue, Empty
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_OUTCOMES = ('failed', 'timeout', 'blocked')
+
+
+class DateScheduler:
+    def __init__(self, num_workers, task_timeout=300, max_retries=1, cancel_event=None):
+        self.num_workers = max(1, num_workers)
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.cancel_event = cancel_event or threading.Event()
+
+    def run(self, dates, task, on_complete=None, on_retry=None):
+        dates = list(dict.fromkeys(dates))
+        if not dates:
+            return {}
+
+        work = Queue()
+        done = Queue()
+        in_flight = {}
+        lock = threading.Lock()
+        outcomes = {}
+        workers = []
+
+        def worker():
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                scrape_date, attempt = item
+                token = object()
+                with lock:
+                    in_flight[scrape_date] = (attempt, time.monotonic(), token)
+                if self.cancel_event.is_set():
+                    done.put((scrape_date, attempt, token, 'cancelled'))
+                    continue
+                try:
+                    outcome = task(scrape_date)
+                except Exception as e:
+                    logger.warning(f"⚠️ Task for {scrape_date} raised: {str(e).splitlines()[0] if str(e) else e.__class__.__name__}")
+                    outcome = 'failed'
+                with lock:
+                    current = in_flight.get(scrape_date)
+                    abandoned = current is None or current[2] is not token
+                if abandoned:
+                    return
+                done.put((scrape_date, attempt, token, outcome))
+
+        def start_worker():
+            thread = threading.Thread(target=worker, name=f'scrape-worker-{len(workers) + 1}', daemon=True)
+            workers.append(thread)
+            thread.start()
+
+        def finish(scrape_date, attempt, outcome):
+            if outcome in RETRYABLE_OUTCOMES and attempt <= self.max_retries and not self.cancel_event.is_set():
+                logger.info(f"🔁 Retrying {scrape_date} after '{outcome}' (attempt {attempt + 1}/{self.max_retries + 1})")
+                metrics.incr('scrape_retries_total', reason=outcome)
+                if on_retry:
+                    on_retry(scrape_date, outcome)
+                work.put((scrape_date, attempt + 1))
+                return False
+            outcomes[scrape_date] = outcome
+            if on_complete:
+                on_complete(scrape_date, outcome)
+            return True
+
+        for scrape_date in dates:
+            work.put((scrape_date, 1))
+        for _ in range(min(self.num_workers, len(dates))):
+            start_worker()
+
+        pending = len(dates)
+        while pending:
+            try:
+                scrape_date, attempt, token, outcome = done.get(timeout=1)
+            except Empty:
+                now = time.monotonic()
+                with lock:
+                    expired = [(d, attempt) for d, (attempt, started, _) in in_flight.items() if now - started > self.task_timeout]
+                    for d, _ in expired:
+                        del in_flight[d]
+                for d, attempt in expired:
+                    logger.warning(f"⏰ Task for {d} exceeded {self.task_timeout}s, abandoning it")
+                    metrics.incr('scrape_task_timeouts_total')
+                    start_worker()
+                    if finish(d, attempt, 'timeout'):
+                        pending -= 1
+                continue
+
+            with lock:
+                current = in_flight.get(scrape_date)
+                if current is None or current[2] is not token:
+                    continue
+                del in_flight[scrape_date]
+            if finish(scrape_date, attempt, outcome):
+                pending -= 1
+
+        for _ in workers:
+            work.put(None)
+        return outcomes
+
+    def cancel(self):
+        self.cancel_event.set()
@@ -0,0 +1,321 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from functools import partial
+
+import undetected_chromedriver as uc
+from selenium.webdriver.common.action_chains import ActionChains
+from selenium.common.exceptions import WebDriverException
+
+from fare_parser import parse_results_page, parse_results_payload
+from metrics import metrics
+from readiness import wait_for_page_state, BLOCKED, NO_RESULTS, PAYLOAD, TIMEOUT
+from search_urls import build_search_url
+
+logger = logging.getLogger(__name__)
+
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*bing.com/bat*", "*adservice.google.*"
+]
+
+
+def random_delay(min_sec=1, max_sec=2):
+    time.sleep(random.uniform(min_sec, max_sec))
+
+
+def human_like_interaction(driver):
+    try:
+        action = ActionChains(driver)
+        for _ in range(random.randint(1, 3)):
+            try:
+                action.move_by_offset(0, 0).perform()
+            except Exception as e:
+                logger.warning(f"❌ Mouse move failed: {str(e).splitlines()[0]}")
+            time.sleep(random.uniform(0.1, 0.3))
+
+        if random.random() > 0.3:
+            scroll_amount = random.randint(200, 600)
+            driver.execute_script(f"window.scrollBy(0, {scroll_amount})")
+            time.sleep(random.uniform(0.5, 1.5))
+    except (WebDriverException, Exception) as e:
+        logger.warning(f"❌ Interaction simulation failed: {str(e).splitlines()[0]}")
+
+
+def prepare_tab(driver, lean=False):
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": """
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            window.navigator.chrome = {
+                runtime: {},
+            };
+            Object.defineProperty(navigator, 'plugins', {
+                get: () => [1, 2, 3]
+            });
+        """
+    })
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+
+
+def setup_driver(lean=False, results_payload_pattern=None, multi_tab=False):
+    options = uc.ChromeOptions()
+    buster_extension_path = os.environ.get('BUSTER_EXTENSION_PATH', r"C:\Users\ASUS TUF\AppData\Local\Google\Chrome\User Data\Default\Extensions\mpbjkejclgfgadiemmefgebjfooflfhl\3.1.0_0")
+
+    if buster_extension_path:
+        if not os.path.exists(buster_extension_path):
+            logger.error(f"❌ Extension path does not exist: {buster_extension_path}")
+            raise RuntimeError(f"Extension path does not exist: {buster_extension_path}")
+        options.add_argument(f"--load-extension={buster_extension_path}")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-infobars")
+    options.add_argument("--disable-notifications")
+    user_agents = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.131 Safari/537.36"
+    ]
+    options.add_argument(f"user-agent={random.choice(user_agents)}")
+    # options.add_argument(f"--window-size={random.randint(1000, 1400)},{random.randint(800, 1200)}")
+    for argument in os.environ.get('CHROME_EXTRA_ARGS', '').split():
+        options.add_argument(argument)
+    if lean:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+    if multi_tab:
+        options.add_argument("--disable-background-timer-throttling")
+        options.add_argument("--disable-backgrounding-occluded-windows")
+        options.add_argument("--disable-renderer-backgrounding")
+    if results_payload_pattern:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    try:
+        driver = uc.Chrome(
+            options=options,
+            headless=os.environ.get('CHROME_HEADLESS', '0') == '1',
+            use_subprocess=True
+        )
+
+        driver.set_window_size(900, 450)
+
+        prepare_tab(driver, lean)
+        if multi_tab:
+            driver.prepare_tab = partial(prepare_tab, lean=lean)
+        driver.results_payload_pattern = results_payload_pattern
+        return driver
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize WebDriver: {str(e).splitlines()[0]}")
+        raise
+
+
+class PayloadCapture:
+    # Response bodies can only be fetched once Chrome has finished loading them, so matching request ids
+    # are remembered across polls until their Network.loadingFinished entry shows up.
+    def __init__(self, driver, url_pattern):
+        self.driver = driver
+        self.url_pattern = url_pattern
+        self._pending = set()
+
+    def drain(self):
+        self._entries()
+        self._pending.clear()
+
+    def poll(self):
+        payloads = []
+        for message in self._entries():
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                if self.url_pattern in response.get('url', '') and 'json' in response.get('mimeType', ''):
+                    self._pending.add(params.get('requestId'))
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                self._pending.discard(params['requestId'])
+                try:
+                    body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+                    payloads.append(json.loads(body['body']))
+                except (WebDriverException, KeyError, ValueError):
+                    continue
+        return payloads
+
+    def _entries(self):
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException as e:
+            logger.warning(f"⚠️ Failed to read network log: {str(e).splitlines()[0]}")
+            return []
+        messages = []
+        for entry in entries:
+            try:
+                messages.append(json.loads(entry['message'])['message'])
+            except (KeyError, ValueError):
+                continue
+        return messages
+
+
+def recover_from_block(driver_pool, driver, limiter=None):
+    logger.info("⚠️ Human verification detected. Clearing cookies and retrying after the block backoff...")
+    try:
+        driver.delete_all_cookies()
+        driver.execute_script("window.localStorage.clear();")
+        driver.execute_script("window.sessionStorage.clear();")
+    except WebDriverException as e:
+        logger.warning(f"⚠️ Failed to clear browser state: {str(e).splitlines()[0]}")
+    driver = driver_pool.renew(driver)
+    if limiter is not None:
+        limiter.report_block()
+        limiter.wait_for_backoff()
+    else:
+        time.sleep(60)
+    return driver
+
+
+def scrape_flight_data_interval(driver_pool, search_params, start_date, on_phase=None, limiter=None):
+    if limiter is None:
+        return _scrape_flight_data_interval(driver_pool, search_params, start_date, on_phase)
+
+    with metrics.timer('scrape_phase_seconds', callback=partial(on_phase, 'throttle_wait') if on_phase else None, phase='throttle_wait'):
+        limiter.acquire()
+    phases = {}
+
+    def record_phase(phase, seconds):
+        phases[phase] = phases.get(phase, 0) + seconds
+        if on_phase:
+            on_phase(phase, seconds)
+
+    started = time.monotonic()
+    outcome = 'failed'
+    try:
+        outcome, flight_data = _scrape_flight_data_interval(driver_pool, search_params, start_date, record_phase, limiter)
+        return outcome, flight_data
+    finally:
+        limiter.release(outcome, time.monotonic() - started - phases.get('block_recovery', 0) - phases.get('lease_wait', 0))
+
+
+def _scrape_flight_data_interval(driver_pool, search_params, start_date, on_phase=None, limiter=None):
+    def timed(phase):
+        return metrics.timer('scrape_phase_seconds', callback=partial(on_phase, phase) if on_phase else None, phase=phase)
+
+    driver = None
+    try:
+        with timed('lease_wait'):
+            driver = driver_pool.lease()
+        nights = int(search_params['nights'])
+        date_from_str = start_date.strftime('%Y-%m-%d')
+        departure_airport = search_params['departure_airport']
+        arrival_airport = search_params['arrival_airport']
+        country = search_params.get('country', 'USA')
+        departure_airport_optional = search_params.get('departure_airport_optional')
+        arrival_airport_optional = search_params.get('arrival_airport_optional')
+        url = build_search_url(search_params, start_date)
+
+        payload_cards = []
+
+        def watch_payloads(driver):
+            # The results JSON usually lands well before the progress bar hides, so it ends the wait early.
+            payload_pattern = getattr(driver, 'results_payload_pattern', None)
+            if not payload_pattern:
+                return None
+            capture = PayloadCapture(driver, payload_pattern)
+            capture.drain()
+            payload_cards.clear()
+
+            def payload_ready(d):
+                for payload in capture.poll():
+                    payload_cards.extend(parse_results_payload(payload))
+                return bool(payload_cards)
+            return payload_ready
+
+        payload_ready = watch_payloads(driver)
+        logger.info(f"[Thread {threading.get_ident()}] Accessing: {url}")
+        with timed('driver_get'):
+            driver.get(url)
+            human_like_interaction(driver)
+
+        load_timeout = random.randint(45, 48)
+        with timed('page_ready'):
+            state = wait_for_page_state(driver, load_timeout, payload_ready=payload_ready)
+        if state == BLOCKED:
+            metrics.incr('scrape_block_events_total')
+            with timed('block_recovery'):
+                driver = recover_from_block(driver_pool, driver, limiter)
+                logger.info(f"[Thread {threading.get_ident()}] 🔄 Retrying after block resolution for {date_from_str}...")
+                payload_ready = watch_payloads(driver)
+                driver.get(url)
+                human_like_interaction(driver)
+            with timed('page_ready'):
+                state = wait_for_page_state(driver, load_timeout, payload_ready=payload_ready)
+
+        if state == TIMEOUT:
+            logger.info(f"[Thread {threading.get_ident()}] ⚠️ Timeout waiting for the results page to load.")
+            metrics.incr('scrape_outcomes_total', outcome='timeout')
+            driver_pool.discard(driver)
+            return 'timeout', None
+        if state == BLOCKED:
+            logger.info(f"[Thread {threading.get_ident()}] ⛔ Still blocked after recovery for {date_from_str}.")
+            metrics.incr('scrape_block_events_total')
+            metrics.incr('scrape_outcomes_total', outcome='blocked')
+            driver_pool.discard(driver)
+            return 'blocked', None
+        if state == NO_RESULTS:
+            logger.info(f"[Thread {threading.get_ident()}] ⚠️ No flights available for {date_from_str}. Skipping.")
+            metrics.incr('scrape_outcomes_total', outcome='no_results')
+            driver_pool.release(driver)
+            return 'no_results', None
+        if state == PAYLOAD:
+            logger.info(f"[Thread {threading.get_ident()}] ✅ Results payload captured - skipping the page render.")
+        else:
+            logger.info(f"[Thread {threading.get_ident()}] ✅ Progress bar hidden - page loaded.")
+
+        with timed('extraction'):
+            if payload_ready is not None and not payload_cards:
+                payload_ready(driver)
+            flights = sorted(payload_cards, key=lambda card: card.price)
+            if not flights:
+                flights = parse_results_page(driver.page_source, country)
+        if not flights:
+            logger.info(f"[Thread {threading.get_ident()}] 🤷🏻‍♂️ No flights found on page for {date_from_str}")
+            metrics.incr('scrape_outcomes_total', outcome='no_results')
+            driver_pool.release(driver)
+            return 'no_results', None
+
+        flight = flights[0]
+        price = flight.price
+
+        month_name = start_date.strftime('%B')
+        formatted_month = month_name[:3]
+        formatted_date = f"{start_date.day:02d}-{formatted_month}-{str(start_date.year)[-2:]}"
+
+        excel_arrival_airport = arrival_airport
+        if departure_airport_optional and arrival_airport_optional:
+            excel_arrival_airport = f"{arrival_airport} x {departure_airport_optional}"
+
+        flight_data = {
+            'Date': formatted_date,
+            'Departure Airport': departure_airport,
+            'Arrival Airport': excel_arrival_airport,
+            'Nights': nights,
+            'Airline': flight.airline,
+            'Price': price,
+            'Departure Time': flight.departure_time,
+            'Arrival Time': flight.arrival_time
+        }
+
+        logger.info(f"[Thread {threading.get_ident()}] 🔍 Found flight: {flight_data['Airline']} for {flight_data['Price']} on {formatted_date} ({len(flights)} result card(s) parsed)")
+        metrics.incr('scrape_outcomes_total', outcome='found')
+        driver_pool.release(driver)
+        return 'found', flight_data
+
+    except Exception as e:
+        logger.warning(f"[Thread {threading.get_ident()}] ⚠️ Error scraping interval starting {start_date}: {str(e).splitlines()[0]}")
+        if driver:
+            driver_pool.discard(driver)
+        metrics.incr('scrape_outcomes_total', outcome='failed')
+        return 'failed', None
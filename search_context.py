@@ -0,0 +1,69 @@
+import threading
+import time
+
+
+class SearchContext:
+    def __init__(self, search_params):
+        self.search_params = search_params
+        self.results = {}
+        self.no_result_dates = set()
+        self.failures = {}
+        self.timings = {}
+        self.phases = {}
+        self.counters = {}
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+
+    def add_result(self, scrape_date, flight_data):
+        with self._lock:
+            self.results.setdefault(scrape_date, flight_data)
+            self.failures.pop(scrape_date, None)
+
+    def add_no_result(self, scrape_date):
+        with self._lock:
+            self.no_result_dates.add(scrape_date)
+            self.failures.pop(scrape_date, None)
+
+    def add_failure(self, scrape_date, reason):
+        with self._lock:
+            if scrape_date not in self.results and scrape_date not in self.no_result_dates:
+                self.failures[scrape_date] = reason
+
+    def record_timing(self, scrape_date, seconds):
+        with self._lock:
+            self.timings.setdefault(scrape_date, []).append(seconds)
+
+    def record_phase(self, phase, seconds):
+        with self._lock:
+            stats = self.phases.setdefault(phase, {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def incr(self, name, step=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + step
+
+    def result_for(self, scrape_date):
+        with self._lock:
+            return self.results.get(scrape_date)
+
+    def missing_dates(self, expected_dates):
+        with self._lock:
+            return sorted(set(expected_dates) - set(self.results) - self.no_result_dates)
+
+    def summary(self):
+        with self._lock:
+            durations = [seconds for attempts in self.timings.values() for seconds in attempts]
+            return {
+                'found': len(self.results),
+                'no_results': len(self.no_result_dates),
+                'failed': len(self.failures),
+                'counters': dict(self.counters),
+                'fetch_seconds_total': round(sum(durations), 2),
+                'fetch_seconds_max': round(max(durations), 2) if durations else 0,
+                'phases': {
+                    phase: {'count': stats['count'], 'total': round(stats['total'], 2), 'max': round(stats['max'], 2)}
+                    for phase, stats in self.phases.items()
+                }
+            }
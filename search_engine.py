@@ -0,0 +1,305 @@
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+
+from cache import ResultCache, SingleFlight
+from driver_pool import open_pool
+from fare_store import FareStore
+from jobs import JobManager
+from metrics import metrics
+from scheduler import DateScheduler
+from search_context import SearchContext
+from search_urls import build_search_url, filter_label, route_label
+from task_queue import open_queue
+from throttle import AdaptiveLimiter
+
+logger = logging.getLogger(__name__)
+
+AIRPORT_CODE = re.compile(r'^[A-Za-z]{3}$')
+
+
+def make_driver(**options):
+    # Imported on first use so the web tier only pays for Chrome and Selenium when it scrapes.
+    from scraper import setup_driver
+    return setup_driver(**options)
+
+
+def date_range(date_from_str, date_to_str):
+    start_date = datetime.strptime(date_from_str, '%Y-%m-%d').date()
+    end_date = datetime.strptime(date_to_str, '%Y-%m-%d').date()
+    dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        dates.append(current_date)
+        current_date += timedelta(days=1)
+    return dates
+
+
+def expand_matrix(spec):
+    routes = spec.get('routes') or []
+    nights_list = spec.get('nights') or []
+    if not isinstance(nights_list, list):
+        nights_list = [nights_list]
+    if not isinstance(routes, list) or not all(isinstance(route, dict) for route in routes):
+        raise ValueError("routes must be a list of objects.")
+    if not routes or not nights_list:
+        raise ValueError("A matrix search needs at least one route and one nights value.")
+    dates = date_range(spec['date_from'], spec['date_to'])
+    if not dates:
+        raise ValueError("date_to must not be before date_from.")
+
+    expanded = []
+    for route in routes:
+        if not route.get('departure_airport') or not route.get('arrival_airport'):
+            raise ValueError("Each route needs a departure_airport and an arrival_airport.")
+        for field in ('departure_airport', 'arrival_airport', 'departure_airport_optional', 'arrival_airport_optional'):
+            if route.get(field) and not AIRPORT_CODE.match(str(route[field])):
+                raise ValueError(f"{field} must be a 3-letter airport code, got {route[field]!r}.")
+        for nights in nights_list:
+            expanded.append({
+                'departure_airport': route['departure_airport'],
+                'arrival_airport': route['arrival_airport'],
+                'departure_airport_optional': route.get('departure_airport_optional'),
+                'arrival_airport_optional': route.get('arrival_airport_optional'),
+                'nights': int(nights),
+                'stops': [str(stop) for stop in route.get('stops', spec.get('stops', ['0', '1']))],
+                'flight_hours': int(route.get('flight_hours', spec.get('flight_hours', 20))),
+                'country': route.get('country', spec.get('country', 'USA'))
+            })
+
+    filter_sets = {}
+    for search_params in expanded:
+        filter_sets.setdefault(route_label(search_params), set()).add(filter_label(search_params))
+
+    tasks = {}
+    for search_params in expanded:
+        sheet_title = route_label(search_params)
+        # Routes that share airports but not filters get their own sheet, or export dedupe would merge them.
+        if len(filter_sets[sheet_title]) > 1:
+            sheet_title += f" ({filter_label(search_params)})"
+        for start_date in dates:
+            tasks.setdefault(build_search_url(search_params, start_date), (sheet_title, search_params, start_date))
+    return tasks
+
+
+class SearchEngine:
+    def __init__(self, config):
+        self.config = config
+        self.job_manager = JobManager(max_concurrent_jobs=config['MAX_CONCURRENT_SEARCHES'])
+        self.result_cache = ResultCache(config['RESULT_CACHE_PATH'], ttl=config['RESULT_CACHE_TTL'], max_entries=config['RESULT_CACHE_MAX_ENTRIES'])
+        self.fare_store = FareStore(config['FARE_STORE_PATH'])
+        self.scrape_flights = SingleFlight()
+
+        self.driver_pool = open_pool(
+            partial(make_driver, lean=config['LEAN_FETCH'], results_payload_pattern=config['RESULTS_PAYLOAD_PATTERN'] or None, multi_tab=config['TABS_PER_BROWSER'] > 1),
+            size=config['DRIVER_POOL_SIZE'],
+            tabs_per_browser=config['TABS_PER_BROWSER'],
+            max_uses=config['DRIVER_MAX_USES'],
+            max_age=config['DRIVER_MAX_AGE']
+        )
+        atexit.register(self.driver_pool.shutdown)
+        # Gauges describe this engine's pool, so they are rendered by its own app rather than registered globally.
+        self.metric_collectors = [self.driver_pool_metrics]
+
+        self.limiter = None
+        if config['ADAPTIVE_CONCURRENCY']:
+            self.limiter = AdaptiveLimiter(
+                self.driver_pool.size,
+                min_limit=config['ADAPTIVE_MIN_WORKERS'],
+                latency_target=config['ADAPTIVE_LATENCY_TARGET'],
+                block_backoff=config['BLOCK_BACKOFF'],
+                max_block_backoff=config['BLOCK_BACKOFF_MAX']
+            )
+            self.metric_collectors.append(lambda: [('adaptive_' + name, 'gauge', value, {}) for name, value in self.limiter.stats().items()])
+
+        self.task_queue = open_queue(config['TASK_QUEUE_URL'], visibility_timeout=config['TASK_TIMEOUT']) if config['TASK_QUEUE_URL'] else None
+        self.scrapes_locally = self.task_queue is None or config['TASK_QUEUE_URL'].startswith('memory:')
+        if self.task_queue is not None and self.scrapes_locally:
+            from worker import start_workers
+            start_workers(self.task_queue, self.driver_pool, self.driver_pool.size, limiter=self.limiter)
+        if self.scrapes_locally and config['DRIVER_POOL_WARMUP'] > 0:
+            threading.Thread(target=self.driver_pool.warm_up, args=(config['DRIVER_POOL_WARMUP'],), name='driver-pool-warmup', daemon=True).start()
+
+    def driver_pool_metrics(self):
+        stats = self.driver_pool.stats()
+        samples = [('driver_pool_' + name, 'gauge', stats[name], {}) for name in ('size', 'open', 'idle', 'leased')]
+        samples.append(('driver_pool_browsers', 'gauge', stats.get('browsers', stats['open']), {}))
+        samples.append(('driver_pool_utilisation', 'gauge', round(stats['leased'] / stats['size'], 3) if stats['size'] else 0, {}))
+        samples += [('driver_pool_events_total', 'counter', stats[event], {'event': event}) for event in ('created', 'recycled', 'renewed', 'discarded')]
+        samples.append(('search_jobs_active', 'gauge', self.job_manager.active_count(), {}))
+        return samples
+
+    def submit_search(self, search_params):
+        return self.job_manager.submit(search_params, self.run_search)
+
+    def submit_matrix_search(self, spec):
+        return self.job_manager.submit(spec, self.run_matrix_search)
+
+    def dispatch_scrape(self, search_params, start_date, on_phase=None):
+        task_id = uuid.uuid4().hex
+        self.task_queue.put_task({'task_id': task_id, 'search_params': search_params, 'date': start_date.strftime('%Y-%m-%d')})
+        result = self.task_queue.get_result(task_id, timeout=self.config['TASK_TIMEOUT'])
+        if result is None:
+            logger.warning(f"⏰ No worker answered task {task_id} for {start_date}")
+            # Nobody will read a late answer, and a retry dispatches a fresh task, so drop this one everywhere.
+            self.task_queue.discard(task_id)
+            return 'timeout', None
+        if on_phase:
+            for phase, seconds in result.get('phases', {}).items():
+                on_phase(phase, seconds)
+        return result['outcome'], result['flight_data']
+
+    def cached_scrape(self, context, key, search_params, start_date):
+        cache_key = build_search_url(search_params, start_date)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            context.incr('cache_hits')
+            metrics.incr('result_cache_lookups_total', result='hit')
+            logger.info(f"💾 Cache hit for {start_date}: {cached['outcome']}")
+            if cached['outcome'] == 'found':
+                context.add_result(key, cached['flight_data'])
+            else:
+                context.add_no_result(key)
+            return cached['outcome']
+
+        context.incr('cache_misses')
+        metrics.incr('result_cache_lookups_total', result='miss')
+
+        def fetch():
+            if self.task_queue is not None:
+                outcome, flight_data = self.dispatch_scrape(search_params, start_date, on_phase=context.record_phase)
+            else:
+                from scraper import scrape_flight_data_interval
+                outcome, flight_data = scrape_flight_data_interval(self.driver_pool, search_params, start_date, on_phase=context.record_phase, limiter=self.limiter)
+            if outcome == 'found':
+                self.result_cache.put(cache_key, {'outcome': outcome, 'flight_data': flight_data})
+                try:
+                    self.fare_store.append(route_label(search_params), start_date, search_params, flight_data)
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to record fare history for {start_date}: {str(e).splitlines()[0]}")
+            elif outcome == 'no_results':
+                self.result_cache.put(cache_key, {'outcome': outcome})
+            return outcome, flight_data
+
+        started = time.monotonic()
+        (outcome, flight_data), shared = self.scrape_flights.do(cache_key, fetch, timeout=self.config['TASK_TIMEOUT'])
+        context.record_timing(key, time.monotonic() - started)
+        if shared:
+            context.incr('coalesced')
+            logger.info(f"🔗 Reused in-flight fetch for {start_date}: {outcome}")
+        if outcome == 'found':
+            context.add_result(key, dict(flight_data))
+        elif outcome == 'no_results':
+            context.add_no_result(key)
+        else:
+            context.add_failure(key, outcome)
+        return outcome
+
+    def run_tasks(self, tasks, context, job, num_workers, exporter):
+        def scrape_one(key):
+            sheet_title, search_params, start_date = tasks[key]
+            return self.cached_scrape(context, key, search_params, start_date)
+
+        cheapest = []
+
+        def publish_date(key, status, record=None):
+            sheet_title, search_params, start_date = tasks[key]
+            job.publish('date', {
+                'route': sheet_title or route_label(search_params),
+                'date': start_date.strftime('%Y-%m-%d'),
+                'nights': search_params['nights'],
+                'status': status,
+                'record': record,
+                'cheapest': cheapest[0] if cheapest else None,
+                'completed': job.completed,
+                'total': job.total
+            })
+
+        def track(key, outcome):
+            record = None
+            if outcome == 'found':
+                record = context.result_for(key)
+                exporter.append(record, sheet_title=tasks[key][0])
+                if not cheapest or record['Price'] < cheapest[0]['Price']:
+                    cheapest[:] = [record]
+            elif outcome != 'no_results':
+                context.add_failure(key, outcome)
+            job.advance()
+            publish_date(key, outcome, record)
+
+        def retrying(key, outcome):
+            publish_date(key, 'retrying')
+
+        num_workers = max(1, min(num_workers, len(tasks)))
+        job.set_phase('scraping', total=len(tasks))
+        scheduler = DateScheduler(num_workers, task_timeout=self.config['TASK_TIMEOUT'], max_retries=self.config['TASK_MAX_RETRIES'], cancel_event=job.cancel_event)
+        scheduler.run(list(tasks), scrape_one, on_complete=track, on_retry=retrying)
+        logger.info(f"✈️ Total number of flights found across all intervals: {exporter.rows}")
+
+        missing = context.missing_dates(tasks)
+        logger.info(f"❗ Final missing: {[tasks[key][2] for key in missing]}")
+
+        if missing and not job.cancel_event.is_set():
+            logger.info(f"🔁 Missing dates detected: {len(missing)}. Re-scraping...")
+
+            job.set_phase('retrying missing dates', total=len(missing))
+            for key in missing:
+                retrying(key, context.failures.get(key))
+            retry_scheduler = DateScheduler(min(num_workers, len(missing)), task_timeout=self.config['TASK_TIMEOUT'], max_retries=0, cancel_event=job.cancel_event)
+            retry_scheduler.run(missing, scrape_one, on_complete=track, on_retry=retrying)
+            logger.info("✅ All retry tasks completed.")
+
+    def run_search(self, search_params, job):
+        from export import ExcelExporter
+
+        departure_airport = search_params['departure_airport']
+        arrival_airport = search_params['arrival_airport']
+        departure_airport_optional = search_params.get('departure_airport_optional')
+        arrival_airport_optional = search_params.get('arrival_airport_optional')
+
+        interval_starts = date_range(search_params['date_from'], search_params['date_to'])
+        tasks = {start_date: (None, search_params, start_date) for start_date in interval_starts}
+
+        output_file = f"{departure_airport.upper()} - {arrival_airport.upper()}{f' x {departure_airport_optional.upper()}' if departure_airport_optional and arrival_airport_optional else ''}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        exporter = ExcelExporter(os.path.join(str(self.config['UPLOAD_FOLDER']), output_file))
+
+        context = SearchContext(search_params)
+        job.context = context
+        self.run_tasks(tasks, context, job, int(search_params.get('num_tabs', 5)), exporter)
+
+        job.set_phase('exporting')
+        if not exporter.save():
+            return None
+        logger.info(f"💾 Final results Saved to {output_file}")
+        if context.no_result_dates:
+            logger.info("📭 Dates with no matching results:")
+            for d in sorted(context.no_result_dates):
+                logger.info(f"❌ {d.strftime('%d-%b-%Y')}")
+        return output_file
+
+    def run_matrix_search(self, spec, job):
+        from export import ExcelExporter, ParquetExporter
+
+        tasks = expand_matrix(spec)
+        logger.info(f"🧮 Matrix search expanded to {len(tasks)} unique page(s)")
+
+        output_format = spec.get('format', 'xlsx')
+        output_file = f"Matrix_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{'xlsx' if output_format == 'xlsx' else 'parquet'}"
+        output_path = os.path.join(str(self.config['UPLOAD_FOLDER']), output_file)
+        exporter = ExcelExporter(output_path) if output_format == 'xlsx' else ParquetExporter(output_path)
+
+        context = SearchContext(spec)
+        job.context = context
+        self.run_tasks(tasks, context, job, int(spec.get('num_tabs', self.driver_pool.size)), exporter)
+
+        job.set_phase('exporting')
+        if not exporter.save():
+            return None
+        logger.info(f"💾 Matrix results saved to {output_file}")
+        return output_file
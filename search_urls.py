@@ -0,0 +1,49 @@
+import os
+from datetime import timedelta
+
+
+def build_search_url(search_params, start_date):
+    nights = int(search_params['nights'])
+    date_from_str = start_date.strftime('%Y-%m-%d')
+    date_to_str = (start_date + timedelta(days=nights)).strftime('%Y-%m-%d')
+    departure_airport = search_params['departure_airport']
+    arrival_airport = search_params['arrival_airport']
+    stops = search_params['stops']
+    flight_hours = int(search_params['flight_hours'])
+    country = search_params.get('country', 'USA')
+    departure_airport_optional = search_params.get('departure_airport_optional')
+    arrival_airport_optional = search_params.get('arrival_airport_optional')
+
+    stops_param = ""
+    if stops:
+        stops_list = []
+        if '0' in stops:
+            stops_list.append("0")
+        for stop in stops:
+            if stop.isdigit() and stop != '0':
+                stops_list.append(stop)
+        if stops_list:
+            stops_param = ";stops=" + ",".join(stops_list)
+
+    base_url = "https://www.kayak.com/flights"
+    if country == 'Canada':
+        base_url = "https://www.ca.kayak.com/flights"
+    if os.environ.get('FLIGHTS_BASE_URL'):
+        base_url = os.environ['FLIGHTS_BASE_URL'].rstrip('/')
+
+    url = f"{base_url}/{departure_airport}-{arrival_airport}/{date_from_str}/{date_to_str}/2adults?sort=price_a&fs=legdur=-{flight_hours * 60}{stops_param};virtualinterline=-virtualinterline;airportchange=-airportchange"
+    if country in ['USA', 'Canada'] and departure_airport_optional and arrival_airport_optional:
+        url = f"{base_url}/{departure_airport}-{arrival_airport}/{date_from_str}/{departure_airport_optional}-{arrival_airport_optional}/{date_to_str}/2adults?sort=price_a&fs=legdur=-{flight_hours * 60}{stops_param};virtualinterline=-virtualinterline;airportchange=-airportchange"
+    return url
+
+
+def route_label(search_params):
+    label = f"{search_params['departure_airport'].upper()}-{search_params['arrival_airport'].upper()}"
+    if search_params.get('departure_airport_optional') and search_params.get('arrival_airport_optional'):
+        label += f" x {search_params['departure_airport_optional'].upper()}-{search_params['arrival_airport_optional'].upper()}"
+    return label
+
+
+def filter_label(search_params):
+    stops = '+'.join(str(stop) for stop in search_params.get('stops') or []) or 'any'
+    return f"{search_params.get('country', 'USA')}, {stops} stops, {int(search_params['flight_hours'])}h"
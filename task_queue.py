@@ -0,0 +1,270 @@
+import json
+import logging
+import queue
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessQueue:
+    def __init__(self):
+        self._tasks = queue.Queue()
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def put_task(self, task):
+        with self._lock:
+            self._results[task['task_id']] = queue.Queue(maxsize=1)
+        self._tasks.put(json.dumps(task))
+
+    def get_task(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                task = json.loads(self._tasks.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                return None
+            with self._lock:
+                if task['task_id'] in self._results:
+                    return task
+
+    def put_result(self, task_id, result):
+        # Only tasks someone is still waiting on keep a result slot; late results are dropped.
+        with self._lock:
+            results = self._results.get(task_id)
+        if results is not None:
+            try:
+                results.put_nowait(json.dumps(result))
+            except queue.Full:
+                pass
+
+    def get_result(self, task_id, timeout=None):
+        with self._lock:
+            results = self._results.get(task_id)
+        if results is None:
+            return None
+        try:
+            return json.loads(results.get(timeout=timeout))
+        except queue.Empty:
+            return None
+        finally:
+            self.discard(task_id)
+
+    def discard(self, task_id):
+        with self._lock:
+            self._results.pop(task_id, None)
+
+
+class SQLiteQueue:
+    def __init__(self, path, visibility_timeout=300, result_ttl=3600, poll_interval=0.5):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                claimed_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                task_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+    def put_task(self, task):
+        conn = self._conn()
+        conn.execute("INSERT INTO tasks (payload) VALUES (?)", (json.dumps(task),))
+        conn.commit()
+
+    def get_task(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while True:
+            task = self._claim()
+            if task is not None or time.monotonic() >= deadline:
+                return task
+            time.sleep(self.poll_interval)
+
+    def put_result(self, task_id, result):
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # A missing task row means the dispatcher discarded it or another worker already answered.
+            deleted = conn.execute("DELETE FROM tasks WHERE json_extract(payload, '$.task_id') = ?", (task_id,)).rowcount
+            if deleted:
+                conn.execute("INSERT OR REPLACE INTO results (task_id, payload, created_at) VALUES (?, ?, ?)", (task_id, json.dumps(result), now))
+            conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.result_ttl,))
+
+    def get_result(self, task_id, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        conn = self._conn()
+        while True:
+            row = conn.execute("SELECT payload FROM results WHERE task_id = ?", (task_id,)).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM results WHERE task_id = ?", (task_id,))
+                conn.commit()
+                return json.loads(row[0])
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def discard(self, task_id):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM tasks WHERE json_extract(payload, '$.task_id') = ?", (task_id,))
+            conn.execute("DELETE FROM results WHERE task_id = ?", (task_id,))
+
+    def _claim(self):
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM tasks WHERE claimed_at IS NULL OR claimed_at < ? ORDER BY id LIMIT 1",
+                (now - self.visibility_timeout,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE tasks SET claimed_at = ? WHERE id = ?", (now, row[0]))
+        return json.loads(row[1])
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+class RespError(Exception):
+    pass
+
+
+class RespConnection:
+    def __init__(self, host='localhost', port=6379, db=0, password=None, timeout=None):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._reader = self._sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def execute(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RespError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    def close(self):
+        try:
+            self._reader.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class RedisQueue:
+    def __init__(self, host='localhost', port=6379, db=0, password=None, prefix='kfs', result_ttl=3600):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+
+    def put_task(self, task):
+        self._execute('LPUSH', f"{self.prefix}:tasks", json.dumps(task))
+
+    def get_task(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while True:
+            reply = self._execute('BRPOP', f"{self.prefix}:tasks", max(1, int(deadline - time.monotonic())))
+            if not reply:
+                return None
+            task = json.loads(reply[1])
+            if not self._execute('EXISTS', self._discarded_key(task['task_id'])):
+                return task
+            if time.monotonic() >= deadline:
+                return None
+
+    def put_result(self, task_id, result):
+        if self._execute('EXISTS', self._discarded_key(task_id)):
+            return
+        key = f"{self.prefix}:result:{task_id}"
+        self._execute('LPUSH', key, json.dumps(result))
+        self._execute('EXPIRE', key, self.result_ttl)
+
+    def get_result(self, task_id, timeout=None):
+        reply = self._execute('BRPOP', f"{self.prefix}:result:{task_id}", 0 if timeout is None else max(1, int(timeout)))
+        return json.loads(reply[1]) if reply else None
+
+    def discard(self, task_id):
+        # Queued entries cannot be removed by id, so leave a marker that workers check before running one.
+        self._execute('SET', self._discarded_key(task_id), 1, 'EX', self.result_ttl)
+        self._execute('DEL', f"{self.prefix}:result:{task_id}")
+
+    def _discarded_key(self, task_id):
+        return f"{self.prefix}:discarded:{task_id}"
+
+    def _execute(self, *args):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = RespConnection(self.host, self.port, self.db, self.password)
+        try:
+            return conn.execute(*args)
+        except (OSError, ConnectionError):
+            conn.close()
+            self._local.conn = None
+            raise
+
+
+def open_queue(url, visibility_timeout=300):
+    parsed = urlparse(url)
+    if parsed.scheme in ('memory', ''):
+        return InProcessQueue()
+    if parsed.scheme == 'sqlite':
+        return SQLiteQueue(parsed.path[1:] or 'task_queue.sqlite3', visibility_timeout=visibility_timeout)
+    if parsed.scheme == 'redis':
+        db = int(parsed.path.lstrip('/') or 0)
+        return RedisQueue(parsed.hostname or 'localhost', parsed.port or 6379, db=db, password=parsed.password)
+    raise ValueError(f"Unsupported task queue URL: {url}")
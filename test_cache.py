@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlight
+
+
+def run_followers(flight, key, fn, count, timeout=None):
+    results, errors = [], []
+
+    def follow():
+        try:
+            results.append(flight.do(key, fn, timeout=timeout))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'found'
+
+    threads, results, errors = run_followers(flight, 'k', fetch, 4, timeout=5)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [('found', False)] + [('found', True)] * 3
+    assert not errors
+
+
+def test_followers_reraise_the_leaders_error():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError('boom')
+
+    threads, results, errors = run_followers(flight, 'k', fetch, 3, timeout=5)
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert not results
+    assert [str(e) for e in errors] == ['boom'] * 3
+    with pytest.raises(RuntimeError):
+        flight.do('k', fetch)
+
+
+def test_follower_gives_up_on_a_stale_leader():
+    flight = SingleFlight()
+    calls = []
+    hung = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            hung.wait(5)
+            return 'timeout'
+        return 'found'
+
+    leader = threading.Thread(target=flight.do, args=('k', fetch), kwargs={'timeout': 0.3})
+    leader.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    assert flight.do('k', fetch, timeout=0.3) == ('found', False)
+    assert time.monotonic() - started < 1
+    assert len(calls) == 2
+
+    # The stale leader finishing later must not evict the newer call's entry or leak its own.
+    hung.set()
+    leader.join()
+    assert flight.do('k', lambda: 'again', timeout=0.3) == ('again', False)
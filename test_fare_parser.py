@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from fare_parser import parse_results_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_only_top_level_cards_are_parsed():
+    cards = parse_results_page(load_fixture('results_usa.html'), 'USA')
+    assert [card.airline for card in cards] == ['Delta', 'United', 'JetBlue']
+
+
+def test_usa_card_fields():
+    card = parse_results_page(load_fixture('results_usa.html'), 'USA')[0]
+    assert card.price == 1249.0
+    assert (card.departure_time, card.arrival_time) == ('8:15 am', '8:40 pm')
+
+
+def test_non_usa_cards_use_operator_airline():
+    card = parse_results_page(load_fixture('results_canada.html'), 'Canada')[0]
+    assert card.airline == 'Air Canada'
+    assert card.price == 1432.0
+
+
+def test_canada_price_prefix_is_stripped():
+    card = parse_results_page(load_fixture('results_canada.html'), 'Canada')[0]
+    assert card.price_text == '1432'
+
+
+def test_missing_price_raises():
+    card = parse_results_page(load_fixture('results_usa.html'), 'USA')[2]
+    assert card.arrival_time == '-'
+    with pytest.raises(ValueError):
+        card.price
+
+
+def test_empty_page():
+    assert parse_results_page('', 'USA') == []
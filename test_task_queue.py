@@ -0,0 +1,160 @@
+import socketserver
+import threading
+import time
+
+import pytest
+
+from task_queue import InProcessQueue, RedisQueue, SQLiteQueue, open_queue
+
+
+class FakeRedis:
+    # Just enough of the Redis command set for RedisQueue, served over RESP from a background thread.
+    def __init__(self):
+        self.lists = {}
+        self.keys = {}
+        self._changed = threading.Condition()
+        self._server = None
+
+    def start(self):
+        fake = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        command = self.read_command()
+                    except ConnectionError:
+                        return
+                    self.wfile.write(fake.reply(fake.execute(command)))
+
+            def read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    raise ConnectionError()
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def execute(self, args):
+        name, args = args[0].decode().upper(), args[1:]
+        with self._changed:
+            if name in ('SELECT', 'AUTH', 'EXPIRE'):
+                return 'OK' if name != 'EXPIRE' else 1
+            if name == 'LPUSH':
+                self.lists.setdefault(args[0], []).insert(0, args[1])
+                self._changed.notify_all()
+                return len(self.lists[args[0]])
+            if name == 'BRPOP':
+                deadline = time.monotonic() + int(args[1]) if int(args[1]) else None
+                while not self.lists.get(args[0]):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._changed.wait(remaining)
+                return [args[0], self.lists[args[0]].pop()]
+            if name == 'SET':
+                self.keys[args[0]] = args[1]
+                return 'OK'
+            if name == 'EXISTS':
+                return int(args[0] in self.keys)
+            if name == 'DEL':
+                return int(self.keys.pop(args[0], None) is not None) + int(self.lists.pop(args[0], None) is not None)
+            return Exception(f"ERR unknown command '{name}'")
+
+    def reply(self, value):
+        if value is None:
+            return b"*-1\r\n"
+        if isinstance(value, Exception):
+            return f"-{value}\r\n".encode()
+        if isinstance(value, int):
+            return f":{value}\r\n".encode()
+        if isinstance(value, str):
+            return f"+{value}\r\n".encode()
+        if isinstance(value, bytes):
+            return f"${len(value)}\r\n".encode() + value + b"\r\n"
+        return f"*{len(value)}\r\n".encode() + b"".join(self.reply(item) for item in value)
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def task_queue(request, tmp_path):
+    if request.param == 'memory':
+        yield InProcessQueue()
+    elif request.param == 'sqlite':
+        yield SQLiteQueue(str(tmp_path / 'queue.sqlite3'), poll_interval=0.05)
+    else:
+        server = FakeRedis()
+        host, port = server.start()
+        yield RedisQueue(host, port)
+        server.stop()
+
+
+def test_task_round_trip(task_queue):
+    task_queue.put_task({'task_id': 'a', 'date': '2030-01-01'})
+    assert task_queue.get_task(timeout=1) == {'task_id': 'a', 'date': '2030-01-01'}
+
+
+def test_result_round_trip(task_queue):
+    task_queue.put_task({'task_id': 'a'})
+    task = task_queue.get_task(timeout=1)
+    task_queue.put_result(task['task_id'], {'outcome': 'found'})
+    assert task_queue.get_result('a', timeout=1) == {'outcome': 'found'}
+
+
+def test_result_reaches_waiting_dispatcher(task_queue):
+    task_queue.put_task({'task_id': 'a'})
+    threading.Timer(0.2, lambda: task_queue.put_result(task_queue.get_task(timeout=1)['task_id'], {'outcome': 'no_results'})).start()
+    assert task_queue.get_result('a', timeout=5) == {'outcome': 'no_results'}
+
+
+def test_get_task_times_out(task_queue):
+    started = time.monotonic()
+    assert task_queue.get_task(timeout=1) is None
+    assert time.monotonic() - started < 3
+
+
+def test_get_result_times_out(task_queue):
+    task_queue.put_task({'task_id': 'a'})
+    assert task_queue.get_result('a', timeout=1) is None
+
+
+def test_discarded_task_is_skipped(task_queue):
+    task_queue.put_task({'task_id': 'a'})
+    task_queue.put_task({'task_id': 'b'})
+    task_queue.discard('a')
+    assert task_queue.get_task(timeout=1) == {'task_id': 'b'}
+
+
+def test_late_result_is_dropped(task_queue):
+    task_queue.put_task({'task_id': 'a'})
+    task = task_queue.get_task(timeout=1)
+    assert task_queue.get_result('a', timeout=1) is None
+    task_queue.discard('a')
+    task_queue.put_result(task['task_id'], {'outcome': 'found'})
+    assert task_queue.get_result('a', timeout=1) is None
+
+
+def test_sqlite_purges_stale_results(tmp_path):
+    task_queue = SQLiteQueue(str(tmp_path / 'queue.sqlite3'), result_ttl=60, poll_interval=0.05)
+    conn = task_queue._conn()
+    conn.execute("INSERT INTO results (task_id, payload, created_at) VALUES ('old', '{}', ?)", (time.time() - 120,))
+    task_queue.put_task({'task_id': 'a'})
+    task_queue.put_result(task_queue.get_task(timeout=1)['task_id'], {'outcome': 'found'})
+    assert [row[0] for row in conn.execute("SELECT task_id FROM results")] == ['a']
+
+
+def test_sqlite_reclaims_after_visibility_timeout(tmp_path):
+    task_queue = open_queue(f"sqlite:///{tmp_path / 'queue.sqlite3'}", visibility_timeout=0)
+    task_queue.put_task({'task_id': 'a'})
+    assert task_queue.get_task(timeout=1) == {'task_id': 'a'}
+    assert task_queue.get_task(timeout=1) == {'task_id': 'a'}
@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+SUCCESS_OUTCOMES = ('found', 'no_results')
+CONGESTION_OUTCOMES = ('timeout', 'blocked', 'failed')
+
+
+class AdaptiveLimiter:
+    # Additive increase / multiplicative decrease over the number of pages loading at once,
+    # plus a pool-wide start interval and a block backoff that every worker waits out.
+    def __init__(self, max_limit, min_limit=1, increase=1.0, decrease=0.5, latency_target=30,
+                 max_pace=10, block_backoff=15, max_block_backoff=120, window=50):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.max_pace = max_pace
+        self.block_backoff = block_backoff
+        self.max_block_backoff = max_block_backoff
+        self.limit = float(self.max_limit)
+        self.pace = 0.0
+        self.in_flight = 0
+        self.latency = None
+        self._next_start = 0.0
+        self._backoff_until = 0.0
+        self._next_backoff = block_backoff
+        self._last_decrease = 0.0
+        self._recent = deque(maxlen=window)
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = max(self._backoff_until, self._next_start) - now
+                if self.in_flight < int(self.limit) and wait <= 0:
+                    self.in_flight += 1
+                    self._next_start = now + self.pace
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, outcome, seconds=None):
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._record(outcome, seconds)
+            self._cond.notify_all()
+
+    def report_block(self):
+        with self._cond:
+            self._record('blocked', None)
+            self._cond.notify_all()
+
+    def wait_for_backoff(self):
+        with self._cond:
+            while True:
+                remaining = self._backoff_until - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+    def stats(self):
+        with self._cond:
+            recent = list(self._recent)
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'pace_seconds': round(self.pace, 3),
+                'backoff_seconds': round(max(0.0, self._backoff_until - time.monotonic()), 1),
+                'latency_seconds': round(self.latency, 2) if self.latency is not None else 0,
+                'timeout_rate': round(recent.count('timeout') / len(recent), 3) if recent else 0,
+                'block_rate': round(recent.count('blocked') / len(recent), 3) if recent else 0
+            }
+
+    def _record(self, outcome, seconds):
+        now = time.monotonic()
+        self._recent.append(outcome)
+        if seconds is not None:
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+
+        if outcome in SUCCESS_OUTCOMES:
+            self._next_backoff = self.block_backoff
+            if seconds is not None and seconds > self.latency_target:
+                return
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self.pace = self.pace * 0.9 if self.pace > 0.05 else 0.0
+            return
+
+        if outcome not in CONGESTION_OUTCOMES:
+            return
+        if outcome == 'blocked':
+            self._backoff_until = max(self._backoff_until, now + self._next_backoff)
+            logger.info(f"🧊 Block page seen, pausing all workers for {self._next_backoff:.0f}s")
+            self._next_backoff = min(self._next_backoff * 2, self.max_block_backoff)
+        # One decrease per round trip, so a burst of failures from pages started together counts once.
+        if now - self._last_decrease < max(1.0, self.latency or 0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        self.pace = min(self.max_pace, max(self.pace * 2, 1.0))
+        logger.info(f"📉 '{outcome}' outcome, concurrency limit now {int(self.limit)} with {self.pace:.1f}s between page starts")
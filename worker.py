@@ -0,0 +1,121 @@
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+from driver_pool import open_pool
+from scraper import setup_driver, scrape_flight_data_interval
+from task_queue import open_queue
+from throttle import AdaptiveLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def handle_task(driver_pool, task, limiter=None):
+    start_date = datetime.strptime(task['date'], '%Y-%m-%d').date()
+    phases = {}
+
+    def on_phase(phase, seconds):
+        phases[phase] = phases.get(phase, 0) + seconds
+
+    started = time.monotonic()
+    outcome, flight_data = scrape_flight_data_interval(driver_pool, task['search_params'], start_date, on_phase=on_phase, limiter=limiter)
+    return {
+        'task_id': task['task_id'],
+        'outcome': outcome,
+        'flight_data': flight_data,
+        'phases': phases,
+        'elapsed': time.monotonic() - started,
+        'worker': socket.gethostname()
+    }
+
+
+def worker_loop(task_queue, driver_pool, stop_event, limiter=None):
+    while not stop_event.is_set():
+        try:
+            task = task_queue.get_task(timeout=5)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to fetch task from queue: {str(e).splitlines()[0] if str(e) else e.__class__.__name__}")
+            time.sleep(5)
+            continue
+        if task is None:
+            continue
+
+        logger.info(f"📦 Picked up task {task['task_id']} for {task['date']}")
+        try:
+            result = handle_task(driver_pool, task, limiter)
+        except Exception as e:
+            logger.warning(f"⚠️ Task {task['task_id']} failed: {str(e).splitlines()[0] if str(e) else e.__class__.__name__}")
+            result = {'task_id': task['task_id'], 'outcome': 'failed', 'flight_data': None, 'phases': {}}
+        try:
+            task_queue.put_result(task['task_id'], result)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to push result for task {task['task_id']}: {str(e).splitlines()[0] if str(e) else e.__class__.__name__}")
+
+
+def start_workers(task_queue, driver_pool, count, stop_event=None, limiter=None):
+    stop_event = stop_event or threading.Event()
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(target=worker_loop, args=(task_queue, driver_pool, stop_event, limiter), name=f'queue-worker-{i + 1}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    logger.info(f"👷 Started {count} queue worker(s)")
+    return threads, stop_event
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pull per-date scrape tasks from a queue and push results back.")
+    parser.add_argument('--queue', default=os.environ.get('TASK_QUEUE_URL', 'sqlite:///task_queue.sqlite3'), help="memory://, sqlite:///path or redis://host:port/db")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('DRIVER_POOL_SIZE', 5)), help="number of concurrent browsers")
+    parser.add_argument('--tabs', type=int, default=int(os.environ.get('TABS_PER_BROWSER', 1)), help="tabs per browser; each tab takes tasks on its own")
+    parser.add_argument('--lean', action='store_true', default=os.environ.get('LEAN_FETCH', '0') == '1', help="block images, fonts, media and analytics")
+    parser.add_argument('--payload-pattern', default=os.environ.get('RESULTS_PAYLOAD_PATTERN', ''), help="read results from JSON responses whose URL contains this")
+    parser.add_argument('--warmup', type=int, default=int(os.environ.get('DRIVER_POOL_WARMUP', 2)), help="browsers to start before taking tasks")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[logging.StreamHandler()]
+    )
+
+    task_queue = open_queue(args.queue, visibility_timeout=int(os.environ.get('TASK_TIMEOUT', 300)))
+    driver_pool = open_pool(
+        partial(setup_driver, lean=args.lean, results_payload_pattern=args.payload_pattern or None, multi_tab=args.tabs > 1),
+        size=args.workers,
+        tabs_per_browser=args.tabs,
+        max_uses=int(os.environ.get('DRIVER_MAX_USES', 50)),
+        max_age=int(os.environ.get('DRIVER_MAX_AGE', 1800))
+    )
+    limiter = None
+    if os.environ.get('ADAPTIVE_CONCURRENCY', '1') == '1':
+        limiter = AdaptiveLimiter(
+            driver_pool.size,
+            min_limit=int(os.environ.get('ADAPTIVE_MIN_WORKERS', 1)),
+            latency_target=float(os.environ.get('ADAPTIVE_LATENCY_TARGET', 30)),
+            block_backoff=float(os.environ.get('BLOCK_BACKOFF', 15)),
+            max_block_backoff=float(os.environ.get('BLOCK_BACKOFF_MAX', 120))
+        )
+    if args.warmup > 0:
+        driver_pool.warm_up(args.warmup)
+
+    threads, stop_event = start_workers(task_queue, driver_pool, driver_pool.size, limiter=limiter)
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("🛑 Stopping queue workers...")
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=10)
+    finally:
+        driver_pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()